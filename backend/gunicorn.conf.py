@@ -0,0 +1,12 @@
+import os
+
+bind = f"0.0.0.0:{os.getenv('TNYR_PORT', '5502')}"
+
+# Threads keep cheap requests flowing while an Argon2/scrypt call runs. Every worker x thread
+# can hold one legacy Argon2 derivation (TNYR_ARGON2_MEMORY_COST KiB), so stay conservative
+workers = int(os.getenv("TNYR_WORKERS", "") or 2)
+worker_class = "gthread"
+threads = int(os.getenv("TNYR_THREADS", "") or 4)
+
+# Import main once in the master so config, caches and static file index are shared copy-on-write
+preload_app = True
@@ -1,13 +1,24 @@
 import os
+import re
+import base64
 import sqlite3
 import secrets
-from flask import Flask, request, jsonify, redirect
+import hmac
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import partial
+import orjson
+from flask import Flask, Response, request, redirect
+from werkzeug.wrappers import Request as WerkzeugRequest
+from whitenoise import WhiteNoise
 from contextlib import closing
 from urllib.parse import urlparse
 from argon2.low_level import hash_secret_raw, Type
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from hashlib import scrypt as hashlib_scrypt
 
 # --- Determine absolute path for file access ---
@@ -99,28 +110,60 @@ def _load_config_from_env() -> dict:
 
 config = _load_config_from_env()
 
+# Hot-path settings, bound once at import instead of re-indexing config per request
+_DB_PATH = config['database']['path']
+_ID_LEN = config['id_generation']['length']
+_ID_ALPHA = config['id_generation']['allowed_chars']
+_ID_CHARSET = frozenset(_ID_ALPHA)
+_ARGON2_ID = partial(
+    hash_secret_raw,
+    time_cost=config['argon2']['time_cost'],
+    memory_cost=config['argon2']['memory_cost'],
+    parallelism=config['argon2']['parallelism'],
+    hash_len=config['argon2']['hash_length'],
+    type=Type.ID,
+)
+_DELETION_TOKEN = config.get('deletion_token', '')
+_REDIRECT_HOSTS = config['domain']['redirect_hosts']
+_PUBLIC_URL = config['domain']['public_url'].strip().rstrip("/")
+_PUBLIC_HOST = (urlparse(_PUBLIC_URL).netloc or "").lower()
+_PUBLIC_HOSTNAME = _hostname_from_host(_PUBLIC_HOST)
+
 app = Flask(__name__, static_folder='dist', static_url_path='/static')
 
-@app.before_request
-def redirect_configured_hosts_to_public_url():
-    domain_config = config.get("domain", {}) or {}
-    redirect_hosts = domain_config.get("redirect_hosts", set()) or set()
-    request_host = (request.host or "").strip().lower()
-    request_hostname = _hostname_from_host(request_host)
+def read_json():
+    """Parse the request body with orjson; None unless it is a JSON object"""
+    # Like request.get_json(), refuse non-JSON mimetypes (text/plain would skip the CORS preflight)
+    if not request.is_json:
+        return None
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
 
-    if request_host not in redirect_hosts and request_hostname not in redirect_hosts:
+def json_response(payload, status):
+    body = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+    return Response(body, status=status, mimetype='application/json')
+
+# Fixed bodies for the hottest responses, serialized once at import
+LINK_NOT_FOUND = orjson.dumps({"error": "Link not found"})
+URL_SHORTENED = orjson.dumps({"message": "URL shortened successfully"})
+
+def redirect_configured_hosts_to_public_url(request):
+    if not _REDIRECT_HOSTS or not _PUBLIC_URL:
         return None
 
-    public_url = domain_config.get("public_url", "").strip().rstrip("/")
-    if not public_url:
+    request_host = (request.host or "").strip().lower()
+    request_hostname = _hostname_from_host(request_host)
+
+    if request_host not in _REDIRECT_HOSTS and request_hostname not in _REDIRECT_HOSTS:
         return None
 
-    public_host = (urlparse(public_url).netloc or "").lower()
-    public_hostname = _hostname_from_host(public_host)
-    if request_host == public_host or request_hostname == public_hostname:
+    if request_host == _PUBLIC_HOST or request_hostname == _PUBLIC_HOSTNAME:
         return None
 
-    target = f"{public_url}{request.path or '/'}"
+    target = f"{_PUBLIC_URL}{request.path or '/'}"
     if request.query_string:
         target = f"{target}?{request.query_string.decode('utf-8', errors='ignore')}"
 
@@ -143,76 +186,228 @@ if LEGACY_SERVER_SIDE_ENABLED:
         raise ValueError("Invalid salt format") from e
 
 # Database setup
-def get_db():
-    conn = sqlite3.connect(config['database']['path'])
+# Applied once per connection; connections are reused for the lifetime of a thread
+DB_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-20000;
+PRAGMA busy_timeout=5000;
+"""
+
+# Hot statements on the client-side table; the exact same strings hit the per-connection statement cache
+SQL_CLIENT_URL_INSERT = (
+    "INSERT INTO client_side_urls (lookup_hash, encryption_salt, iv, encrypted_url) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(lookup_hash) DO NOTHING"
+)
+SQL_CLIENT_URL_SELECT = "SELECT encryption_salt, iv, encrypted_url FROM client_side_urls WHERE lookup_hash = ?"
+SQL_CLIENT_URL_EXISTS = "SELECT 1 FROM client_side_urls WHERE lookup_hash = ?"
+SQL_CLIENT_URL_UPDATE = "UPDATE client_side_urls SET encryption_salt = ?, iv = ?, encrypted_url = ? WHERE lookup_hash = ?"
+
+# Same for the legacy server-side table
+SQL_LEGACY_URL_SELECT = "SELECT iv, encrypted_url FROM urls WHERE lookup_hash = ?"
+SQL_LEGACY_URL_EXISTS = "SELECT 1 FROM urls WHERE lookup_hash = ?"
+SQL_LEGACY_URL_UPDATE = "UPDATE urls SET iv = ?, encrypted_url = ? WHERE lookup_hash = ?"
+
+_db_local = threading.local()
+
+def _connect_db():
+    # Autocommit: every write here is a single statement, so no implicit BEGIN/COMMIT round-trips
+    conn = sqlite3.connect(_DB_PATH, isolation_level=None, cached_statements=256, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.executescript(DB_PRAGMAS)
+    return conn
+
+def get_db():
+    """Return the calling thread's connection, opening it on first use"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = _db_local.conn = _connect_db()
+        # Closed when the owning thread goes away (or at exit for threads still alive),
+        # so per-request threads of the dev server don't leak connections and WAL fds
+        weakref.finalize(threading.current_thread(), conn.close)
     return conn
 
 # Initialize database
+DB_TABLES = {
+    'urls': ('lookup_hash', 'iv', 'encrypted_url'),
+    'client_side_urls': ('lookup_hash', 'encryption_salt', 'iv', 'encrypted_url'),
+}
+
+def _outdated_tables(conn):
+    """Tables created before schema.sql declared them WITHOUT ROWID with a BLOB lookup_hash"""
+    tables = []
+    for name in DB_TABLES:
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+        if not row:
+            continue
+        column_types = {col['name']: col['type'].upper() for col in conn.execute(f"PRAGMA table_info({name})")}
+        if 'WITHOUT ROWID' not in row['sql'].upper() or column_types.get('lookup_hash') != 'BLOB':
+            tables.append(name)
+    return tables
+
+def _hex_to_blob(value):
+    # Old rows stored lookup hashes as hex TEXT. Only canonical lowercase hex is converted:
+    # fromhex() ignores case and whitespace, so e.g. 'ABCD' would collide with 'abcd'.
+    # Anything else is kept as-is.
+    if isinstance(value, str):
+        try:
+            blob = bytes.fromhex(value)
+        except ValueError:
+            return value
+        return blob if blob.hex() == value else value
+    return value
+
+# Rows are ~100 bytes; larger pages mean a shallower B-tree and fewer page reads per lookup
+DB_PAGE_SIZE = 8192
+
+def _apply_page_size(conn):
+    """Rewrite the file with DB_PAGE_SIZE pages; a no-op once the size matches"""
+    if conn.execute("PRAGMA page_size").fetchone()[0] == DB_PAGE_SIZE:
+        return
+    # The page size can't change while in WAL mode, and only takes effect through VACUUM
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute(f"PRAGMA page_size={DB_PAGE_SIZE}")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA journal_mode=WAL")
+
 def init_db():
-    with closing(get_db()) as conn:
+    with closing(_connect_db()) as conn:
         with app.open_resource('schema.sql', mode='r') as f:
-            conn.cursor().executescript(f.read())
-        conn.commit()
+            schema = f.read()
+
+        # Rebuild outdated tables into the current layout in a single transaction
+        outdated_tables = _outdated_tables(conn)
+        if outdated_tables:
+            conn.create_function('hex_to_blob', 1, _hex_to_blob, deterministic=True)
+            renames = ''.join(f"ALTER TABLE {name} RENAME TO {name}_old;\n" for name in outdated_tables)
+            copies = ''.join(
+                f"INSERT INTO {name} ({', '.join(DB_TABLES[name])}) "
+                f"SELECT hex_to_blob(lookup_hash), {', '.join(DB_TABLES[name][1:])} FROM {name}_old;\n"
+                f"DROP TABLE {name}_old;\n"
+                for name in outdated_tables
+            )
+            conn.executescript(f"BEGIN IMMEDIATE;\n{renames}{schema}\n{copies}COMMIT;")
+        else:
+            conn.executescript(schema)
+
+        _apply_page_size(conn)
 
 # ID generation setup
 def generate_id():
     """Generate random ID based on config"""
-    return ''.join(
-        secrets.choice(config['id_generation']['allowed_chars'])
-        for _ in range(config['id_generation']['length'])
-    )
+    return ''.join(secrets.choice(_ID_ALPHA) for _ in range(_ID_LEN))
+
+# KDF result caches (only ever populated for links that exist)
+KDF_CACHE_SIZE = 4096
+
+class _LRUCache:
+    """Small thread-safe LRU mapping with a hard size cap"""
+
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+# id -> (lookup_hash, encryption_key) for legacy server-side links (both raw bytes)
+_legacy_kdf_cache = _LRUCache(KDF_CACHE_SIZE)
+# id -> lookup_hash for client-side links
+_client_lookup_cache = _LRUCache(KDF_CACHE_SIZE)
+# key -> AESGCM, so the AES key schedule is set up once per key
+_aesgcm_cache = _LRUCache(KDF_CACHE_SIZE)
+# id -> expiry of a recent legacy miss; short-lived so repeated probes skip Argon2
+LEGACY_MISS_TTL = 60
+_legacy_miss_cache = _LRUCache(KDF_CACHE_SIZE)
 
 # Argon2 configuration
 def derive_key(id_bytes, salt):
     """Derive cryptographic key using Argon2 with config parameters"""
     if not LEGACY_SERVER_SIDE_ENABLED:
         raise RuntimeError("Legacy server-side mode is disabled (set TNYR_SALT1_HEX and TNYR_SALT2_HEX to enable)")
-    return hash_secret_raw(
-        secret=id_bytes,
-        salt=salt,
-        time_cost=config['argon2']['time_cost'],
-        memory_cost=config['argon2']['memory_cost'],
-        parallelism=config['argon2']['parallelism'],
-        hash_len=config['argon2']['hash_length'],
-        type=Type.ID
-    )
+    return _ARGON2_ID(secret=id_bytes, salt=salt)
+
+def legacy_lookup_hash(link_id):
+    """Lookup hash of a legacy link, served from cache for known links"""
+    # Must stay Argon2: stored hashes can't be re-derived without the original ids
+    cached = _legacy_kdf_cache.get(link_id)
+    if cached is not None:
+        return cached[0]
+    return derive_key(link_id.encode(), SALT1)
+
+def legacy_encryption_key(link_id, lookup_hash):
+    """Encryption key of a legacy link; only call once the link is known to exist"""
+    cached = _legacy_kdf_cache.get(link_id)
+    if cached is not None:
+        return cached[1]
+    key = derive_key(link_id.encode(), SALT2)
+    _legacy_kdf_cache.put(link_id, (lookup_hash, key))
+    return key
+
+GCM_NONCE_SIZE = 12
+AES_BLOCK_SIZE = 16
+
+def pkcs7_pad(data):
+    """PKCS7-pad data to the AES block size"""
+    n = AES_BLOCK_SIZE - (len(data) % AES_BLOCK_SIZE)
+    return data + bytes((n,)) * n
+
+def pkcs7_unpad(padded):
+    """Strip PKCS7 padding, comparing the pad bytes in constant time"""
+    n = padded[-1] if padded else 0
+    if not 1 <= n <= AES_BLOCK_SIZE or not hmac.compare_digest(padded[-n:], bytes((n,)) * n):
+        raise ValueError("Invalid padding bytes.")
+    return padded[:-n]
+
+def _aesgcm(key):
+    aead = _aesgcm_cache.get(key)
+    if aead is None:
+        aead = AESGCM(key)
+        _aesgcm_cache.put(key, aead)
+    return aead
 
 def encrypt_url(key, plaintext):
-    """Encrypt URL using AES-256-CBC"""
+    """Encrypt URL using AES-256-GCM (nonce is stored in the iv column)"""
     # Validate key length
     if len(key) != 32:
         raise ValueError(f"Invalid key length: {len(key)} bytes (need 32)")
     
-    iv = os.urandom(16)
-    padder = padding.PKCS7(128).padder()
-    padded_data = padder.update(plaintext.encode()) + padder.finalize()
-    
-    cipher = Cipher(
-        algorithms.AES(key),
-        modes.CBC(iv),
-        backend=default_backend()
-    )
-    encryptor = cipher.encryptor()
-    ciphertext = encryptor.update(padded_data) + encryptor.finalize()
+    nonce = os.urandom(GCM_NONCE_SIZE)
+    ciphertext = _aesgcm(key).encrypt(nonce, plaintext.encode(), None)
     
-    return iv, ciphertext
+    return nonce, ciphertext
 
 def decrypt_url(key, iv, ciphertext):
-    """Decrypt URL using AES-256-CBC"""
+    """Decrypt URL using AES-256-GCM, or AES-256-CBC for rows written before GCM"""
     if len(key) != 32:
         raise ValueError(f"Invalid key length: {len(key)} bytes (need 32)")
     
+    if len(iv) == GCM_NONCE_SIZE:
+        return _aesgcm(key).decrypt(iv, ciphertext, None).decode()
+    
+    # Legacy CBC rows have a 16 byte IV
     cipher = Cipher(
         algorithms.AES(key),
-        modes.CBC(iv),
-        backend=default_backend()
+        modes.CBC(iv)
     )
     decryptor = cipher.decryptor()
     padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
     
-    unpadder = padding.PKCS7(128).unpadder()
-    plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
+    plaintext = pkcs7_unpad(padded_plaintext)
     
     return plaintext.decode()
 
@@ -232,7 +427,7 @@ def hash_id_for_lookup_client(id_str):
         dklen=32,
         maxmem=150 * 1024 * 1024  # Allow up to 150MB (scrypt needs ~128MB)
     )
-    return hash_result.hex()
+    return hash_result
 
 def derive_encryption_key_client(id_str, salt):
     """Derive encryption key using the same method as the client (scrypt)"""
@@ -255,13 +450,11 @@ def encrypt_url_client(key, plaintext):
         raise ValueError(f"Invalid key length: {len(key)} bytes (need 32)")
     
     iv = os.urandom(16)
-    padder = padding.PKCS7(128).padder()
-    padded_data = padder.update(plaintext.encode()) + padder.finalize()
+    padded_data = pkcs7_pad(plaintext.encode())
     
     cipher = Cipher(
         algorithms.AES(key),
-        modes.CBC(iv),
-        backend=default_backend()
+        modes.CBC(iv)
     )
     encryptor = cipher.encryptor()
     ciphertext = encryptor.update(padded_data) + encryptor.finalize()
@@ -270,177 +463,22 @@ def encrypt_url_client(key, plaintext):
 
 ABUSE_WARNING_MARKER = '__ABUSE_WARNING__'
 
-@app.route('/delete-url', methods=['POST'])
-def delete_url():
-    """Replace a URL with an abuse warning page (both old and new encryption methods)"""
-    # Check if deletion is enabled
-    deletion_token = config.get('deletion_token', '')
-    if not deletion_token:
-        return jsonify({"error": "URL deletion is disabled"}), 403
-    
-    data = request.get_json()
-    
-    if not data or 'id' not in data or 'deletion_token' not in data:
-        return jsonify({"error": "Missing id or deletion_token"}), 400
-    
-    # Verify deletion token
-    if data['deletion_token'] != deletion_token:
-        return jsonify({"error": "Invalid deletion token"}), 403
-    
-    link_id = data['id']
-    updated = False
-    
-    with get_db() as conn:
-        # Try to update old server-side encrypted URLs table (legacy mode)
-        if LEGACY_SERVER_SIDE_ENABLED:
-            id_bytes = link_id.encode()
-            lookup_hash_old = derive_key(id_bytes, SALT1).hex()
-            
-            # Check if it exists in old table
-            cur = conn.execute(
-                "SELECT 1 FROM urls WHERE lookup_hash = ?",
-                (lookup_hash_old,)
-            )
-            if cur.fetchone():
-                # Re-encrypt the abuse marker using server-side method
-                encryption_key = derive_key(id_bytes, SALT2)
-                iv, encrypted_warning = encrypt_url(encryption_key, ABUSE_WARNING_MARKER)
-                
-                conn.execute(
-                    "UPDATE urls SET iv = ?, encrypted_url = ? WHERE lookup_hash = ?",
-                    (iv, encrypted_warning, lookup_hash_old)
-                )
-                conn.commit()
-                updated = True
-        
-        # If not found, try to update new client-side encrypted URLs table
-        if not updated:
-            lookup_hash_new = hash_id_for_lookup_client(link_id)
-            
-            # Check if it exists in new table
-            cur = conn.execute(
-                "SELECT 1 FROM client_side_urls WHERE lookup_hash = ?",
-                (lookup_hash_new,)
-            )
-            if cur.fetchone():
-                # Re-encrypt the abuse marker using client-side method
-                # Generate new encryption salt (since original was random)
-                new_encryption_salt = os.urandom(16)
-                encryption_key = derive_encryption_key_client(link_id, new_encryption_salt)
-                iv, encrypted_warning = encrypt_url_client(encryption_key, ABUSE_WARNING_MARKER)
-                
-                conn.execute(
-                    "UPDATE client_side_urls SET encryption_salt = ?, iv = ?, encrypted_url = ? WHERE lookup_hash = ?",
-                    (new_encryption_salt, iv, encrypted_warning, lookup_hash_new)
-                )
-                conn.commit()
-                updated = True
-    
-    if updated:
-        return jsonify({"message": "URL replaced with abuse warning successfully"}), 200
-    else:
-        return jsonify({"error": "Link not found"}), 404
-
-@app.route('/shorten-server', methods=['POST'])
-def shorten_url_server():
-    # Legacy shortening is intentionally disabled.
-    # Old /<id> links can still be resolved if legacy salts are configured.
-    return jsonify({
-        "error": "Legacy shortening is disabled. Use the default client-side mode."
-    }), 410
+# Wire encodings for the salt/IV/ciphertext fields; hex stays the default for older clients
+BLOB_FORMATS = ('hex', 'b64')
 
-@app.route('/shorten', methods=['POST'])
-def shorten_url_client():
-    data = request.get_json()
-    required_fields = ['LOOKUP_HASH', 'ENCRYTION_SALT', 'IV', 'ENCRYPTED_URL']
-
-    if not data or not all(field in data for field in required_fields):
-        missing_fields = [field for field in required_fields if field not in (data or {})]
-        return jsonify({"error": f"Missing fields: {', '.join(missing_fields)}"}), 400
+def decode_blob(value, fmt):
+    if fmt == 'b64':
+        return base64.b64decode(value, validate=True)
+    return bytes.fromhex(value)
 
-    lookup_hash = data['LOOKUP_HASH']
-    
-    try:
-        encryption_salt = bytes.fromhex(data['ENCRYTION_SALT'])
-        iv = bytes.fromhex(data['IV'])
-        encrypted_url = bytes.fromhex(data['ENCRYPTED_URL'])
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid hex format for salt, IV, or encrypted URL"}), 400
+def encode_blob(value, fmt):
+    if fmt == 'b64':
+        return base64.b64encode(value).decode('ascii')
+    return value.hex()
 
-    with get_db() as conn:
-        cur = conn.execute(
-            "SELECT 1 FROM client_side_urls WHERE lookup_hash = ?",
-            (lookup_hash,)
-        )
-        if cur.fetchone():
-            return jsonify({"error": "Lookup hash already exists"}), 409
-        
-        conn.execute(
-            "INSERT INTO client_side_urls (lookup_hash, encryption_salt, iv, encrypted_url) VALUES (?, ?, ?, ?)",
-            (lookup_hash, encryption_salt, iv, encrypted_url)
-        )
-        conn.commit()
-
-    return jsonify({"message": "URL shortened successfully"}), 201
-
-@app.route('/get-encrypted-url', methods=['GET'])
-def get_encrypted_url():
-    lookup_hash = request.args.get('lookup_hash')
-
-    if not lookup_hash:
-        return jsonify({"error": "Missing lookup_hash parameter"}), 400
-
-    with get_db() as conn:
-        cur = conn.execute(
-            "SELECT encryption_salt, iv, encrypted_url FROM client_side_urls WHERE lookup_hash = ?",
-            (lookup_hash,)
-        )
-        row = cur.fetchone()
-
-    if not row:
-        return jsonify({"error": "Link not found"}), 404
-
-    return jsonify({
-        "ENCRYTION_SALT": row['encryption_salt'].hex(),
-        "IV": row['iv'].hex(),
-        "ENCRYPTED_URL": row['encrypted_url'].hex()
-    }), 200
-
-@app.route('/<id>') # Still needed for old links
-def redirect_url(id):
-    if not LEGACY_SERVER_SIDE_ENABLED:
-        return jsonify({"error": "Link not found"}), 404
-    id_bytes = id.encode()
-    
-    # Derive lookup hash
-    lookup_hash = derive_key(id_bytes, SALT1).hex()
-    
-    # Retrieve from database
-    with get_db() as conn:
-        cur = conn.execute(
-            "SELECT iv, encrypted_url FROM urls WHERE lookup_hash = ?",
-            (lookup_hash,)
-        )
-        row = cur.fetchone()
-    
-    if not row:
-        return jsonify({"error": "Link not found"}), 404
-    
-    # Derive decryption key
-    decryption_key = derive_key(id_bytes, SALT2)
-    
-    # Decrypt URL
-    try:
-        url = decrypt_url(decryption_key, row['iv'], row['encrypted_url'])
-    except Exception as e:
-        return jsonify({"error": "Decryption failed"}), 500
-    
-    # Check if this is an abuse warning
-    if url == ABUSE_WARNING_MARKER:
-        # Redirect to home page with abuse warning hash
-        domain = (config.get("domain", {}) or {}).get("name", "") or request.host.split(":")[0] or "tnyr.me"
-        domain = domain.strip()
-        abuse_html = f"""<!DOCTYPE html>
+# Rendered once; the domain can't change while the process runs
+_ABUSE_DOMAIN = config['domain']['name'].strip() or "tnyr.me"
+ABUSE_HTML = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -545,56 +583,269 @@ def redirect_url(id):
         </div>
         
         <p style="text-align: center; font-size: 14px;">
-            <strong>If you believe this link was removed in error, please contact us at <a href="mailto:abuse@{domain}">abuse@{domain}</a></strong>
+            <strong>If you believe this link was removed in error, please contact us at <a href="mailto:abuse@{_ABUSE_DOMAIN}">abuse@{_ABUSE_DOMAIN}</a></strong>
         </p>
     </div>
 </body>
-</html>"""
-        return abuse_html, 200
+</html>""".encode('utf-8')
+
+@app.route('/delete-url', methods=['POST'])
+def delete_url():
+    """Replace a URL with an abuse warning page (both old and new encryption methods)"""
+    # Check if deletion is enabled
+    if not _DELETION_TOKEN:
+        return json_response({"error": "URL deletion is disabled"}, 403)
     
-    return redirect(url, code=302)
+    data = read_json()
+    
+    if not data or 'id' not in data or 'deletion_token' not in data:
+        return json_response({"error": "Missing id or deletion_token"}, 400)
+    
+    # Verify deletion token
+    if data['deletion_token'] != _DELETION_TOKEN:
+        return json_response({"error": "Invalid deletion token"}, 403)
+    
+    link_id = data['id']
+    updated = False
+    
+    conn = get_db()
+    # Try to update old server-side encrypted URLs table (legacy mode)
+    if LEGACY_SERVER_SIDE_ENABLED:
+        lookup_hash_old = legacy_lookup_hash(link_id)
+        
+        # Check if it exists in old table
+        cur = conn.execute(SQL_LEGACY_URL_EXISTS, (lookup_hash_old,))
+        if cur.fetchone():
+            # Re-encrypt the abuse marker using server-side method
+            encryption_key = legacy_encryption_key(link_id, lookup_hash_old)
+            iv, encrypted_warning = encrypt_url(encryption_key, ABUSE_WARNING_MARKER)
+            
+            conn.execute(SQL_LEGACY_URL_UPDATE, (iv, encrypted_warning, lookup_hash_old))
+            updated = True
+        
+    # If not found, try to update new client-side encrypted URLs table
+    if not updated:
+        # Callers that already know the LOOKUP_HASH (e.g. from the link's /#id) can pass it
+        # as 'lookup_hash' so a miss costs no scrypt at all; a hit still verifies it against the id
+        try:
+            supplied_lookup_hash = bytes.fromhex(data.get('lookup_hash') or '')
+        except (ValueError, TypeError):
+            return json_response({"error": "Invalid hex format for lookup_hash"}, 400)
+        lookup_hash_new = (
+            supplied_lookup_hash
+            or _client_lookup_cache.get(link_id)
+            or hash_id_for_lookup_client(link_id)
+        )
+        
+        # Check if it exists in new table
+        cur = conn.execute(SQL_CLIENT_URL_EXISTS, (lookup_hash_new,))
+        if cur.fetchone():
+            if supplied_lookup_hash:
+                expected_lookup_hash = _client_lookup_cache.get(link_id) or hash_id_for_lookup_client(link_id)
+                if not hmac.compare_digest(expected_lookup_hash, supplied_lookup_hash):
+                    return json_response({"error": "lookup_hash does not match id"}, 400)
+            _client_lookup_cache.put(link_id, lookup_hash_new)
+            # Re-encrypt the abuse marker using client-side method
+            # Generate new encryption salt (since original was random)
+            new_encryption_salt = os.urandom(16)
+            encryption_key = derive_encryption_key_client(link_id, new_encryption_salt)
+            iv, encrypted_warning = encrypt_url_client(encryption_key, ABUSE_WARNING_MARKER)
+            
+            conn.execute(
+                SQL_CLIENT_URL_UPDATE,
+                (new_encryption_salt, iv, encrypted_warning, lookup_hash_new)
+            )
+            updated = True
+    
+    if updated:
+        return json_response({"message": "URL replaced with abuse warning successfully"}, 200)
+    else:
+        return json_response(LINK_NOT_FOUND, 404)
+
+@app.route('/shorten-server', methods=['POST'])
+def shorten_url_server():
+    # Legacy shortening is intentionally disabled.
+    # Old /<id> links can still be resolved if legacy salts are configured.
+    return json_response({
+        "error": "Legacy shortening is disabled. Use the default client-side mode."
+    }, 410)
+
+@app.route('/shorten', methods=['POST'])
+def shorten_url_client():
+    data = read_json()
+    required_fields = ['LOOKUP_HASH', 'ENCRYTION_SALT', 'IV', 'ENCRYPTED_URL']
+
+    if not data or not all(field in data for field in required_fields):
+        missing_fields = [field for field in required_fields if field not in (data or {})]
+        return json_response({"error": f"Missing fields: {', '.join(missing_fields)}"}, 400)
+
+    blob_format = data.get('FORMAT', 'hex')
+    if blob_format not in BLOB_FORMATS:
+        return json_response({"error": f"Unsupported FORMAT (use {' or '.join(BLOB_FORMATS)})"}, 400)
+    
+    try:
+        lookup_hash = bytes.fromhex(data['LOOKUP_HASH'])
+    except (ValueError, TypeError):
+        return json_response({"error": "Invalid hex format for LOOKUP_HASH"}, 400)
+    
+    try:
+        encryption_salt = decode_blob(data['ENCRYTION_SALT'], blob_format)
+        iv = decode_blob(data['IV'], blob_format)
+        encrypted_url = decode_blob(data['ENCRYPTED_URL'], blob_format)
+    except (ValueError, TypeError):
+        return json_response({"error": f"Invalid {blob_format} format for salt, IV, or encrypted URL"}, 400)
 
-@app.route('/')
-def serve_react_app():
-    return app.send_static_file('index.html')
+    conn = get_db()
+    # Existence check and insert in one statement; nothing is written on conflict
+    cur = conn.execute(SQL_CLIENT_URL_INSERT, (lookup_hash, encryption_salt, iv, encrypted_url))
 
-@app.route("/robots.txt")
-def serve_robots_txt():
-    return app.send_static_file("meta/robots.txt")
+    if cur.rowcount != 1:
+        return json_response({"error": "Lookup hash already exists"}, 409)
 
-@app.route("/sitemap.xml")
-def serve_sitemap_xml():
-    return app.send_static_file("meta/sitemap.xml")
+    return json_response(URL_SHORTENED, 201)
 
-@app.route('/<path:path>')
-def serve_static_files(path):
-    return app.send_static_file(path)
+@app.route('/get-encrypted-url', methods=['GET'])
+def get_encrypted_url():
+    lookup_hash = request.args.get('lookup_hash')
+
+    if not lookup_hash:
+        return json_response({"error": "Missing lookup_hash parameter"}, 400)
+
+    blob_format = request.args.get('format', 'hex')
+    if blob_format not in BLOB_FORMATS:
+        return json_response({"error": f"Unsupported format (use {' or '.join(BLOB_FORMATS)})"}, 400)
+
+    try:
+        lookup_hash = bytes.fromhex(lookup_hash)
+    except ValueError:
+        return json_response({"error": "Invalid hex format for lookup_hash"}, 400)
+
+    conn = get_db()
+    cur = conn.execute(SQL_CLIENT_URL_SELECT, (lookup_hash,))
+    row = cur.fetchone()
+
+    if not row:
+        return json_response(LINK_NOT_FOUND, 404)
+
+    return json_response({
+        "ENCRYTION_SALT": encode_blob(row['encryption_salt'], blob_format),
+        "IV": encode_blob(row['iv'], blob_format),
+        "ENCRYPTED_URL": encode_blob(row['encrypted_url'], blob_format)
+    }, 200)
+
+@app.route('/<id>') # Still needed for old links
+def redirect_url(id):
+    if not LEGACY_SERVER_SIDE_ENABLED:
+        return json_response(LINK_NOT_FOUND, 404)
+    
+    # Ids that generate_id() could never have produced don't get to cost an Argon2 derivation
+    if len(id) != _ID_LEN or not _ID_CHARSET.issuperset(id):
+        return json_response(LINK_NOT_FOUND, 404)
+    
+    miss_expires = _legacy_miss_cache.get(id)
+    if miss_expires is not None and miss_expires > time.monotonic():
+        return json_response(LINK_NOT_FOUND, 404)
+    
+    # Derive lookup hash (cached for links that were found before)
+    lookup_hash = legacy_lookup_hash(id)
+    
+    # Retrieve from database
+    conn = get_db()
+    cur = conn.execute(SQL_LEGACY_URL_SELECT, (lookup_hash,))
+    row = cur.fetchone()
+    
+    if not row:
+        _legacy_miss_cache.put(id, time.monotonic() + LEGACY_MISS_TTL)
+        return json_response(LINK_NOT_FOUND, 404)
+    
+    # Derive decryption key (only for existing links, so misses never enter the key cache)
+    decryption_key = legacy_encryption_key(id, lookup_hash)
+    
+    # Decrypt URL
+    try:
+        url = decrypt_url(decryption_key, row['iv'], row['encrypted_url'])
+    except (InvalidTag, ValueError):
+        # InvalidTag: GCM authentication failed; ValueError: bad CBC padding, IV size or UTF-8
+        return json_response({"error": "Decryption failed"}, 500)
+    
+    # Check if this is an abuse warning
+    if url == ABUSE_WARNING_MARKER:
+        response = Response(ABUSE_HTML, status=200, mimetype='text/html')
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
+    
+    return redirect(url, code=302)
+
+# Static files (frontend build, robots.txt, sitemap.xml) are served by WhiteNoise in front of Flask,
+# so they never reach a route handler. Unknown paths fall through to the routes above.
+# The TNYR_REDIRECT_HOSTS redirect sits in front of both, so it covers / and static files too.
+DIST_DIR = os.path.join(APP_DIR, 'dist')
+
+# Vite fingerprints bundled assets (assets/index-<hash>.js), so they can be cached forever
+_HASHED_ASSET_RE = re.compile(r'^/assets/.+-[A-Za-z0-9_-]{8,}\.\w+$')
+
+def _is_hashed_asset(path, url):
+    return bool(_HASHED_ASSET_RE.match(url))
+
+def _add_static_headers(headers, path, url):
+    # index.html names the current hashed bundles and old ones are deleted on deploy; always revalidate it
+    if path.endswith('.html'):
+        headers['Cache-Control'] = 'no-cache'
+
+class RedirectHostsMiddleware:
+    """WSGI middleware applying redirect_configured_hosts_to_public_url before anything else"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        response = redirect_configured_hosts_to_public_url(WerkzeugRequest(environ))
+        if response is not None:
+            return response(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+static_app = WhiteNoise(
+    app.wsgi_app,
+    index_file=True,
+    immutable_file_test=_is_hashed_asset,
+    add_headers_function=_add_static_headers,
+)
+if os.path.isdir(DIST_DIR):
+    static_app.add_files(DIST_DIR)
+    static_app.add_files(os.path.join(DIST_DIR, 'meta'))
+
+app.wsgi_app = RedirectHostsMiddleware(static_app) if _REDIRECT_HOSTS and _PUBLIC_URL else static_app
+
+# Permissive CORS for development: always on for `python main.py`, opt-in via TNYR_DEV_CORS otherwise
+DEV_CORS_ENABLED = __name__ == '__main__' or os.getenv("TNYR_DEV_CORS", "").strip().lower() in ("1", "true", "yes")
+
+if DEV_CORS_ENABLED:
+    # Built once; both hooks are only registered when CORS is enabled, so production pays nothing
+    _DEV_CORS_HEADERS = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
+    }
+    _DEV_CORS_DEFAULT_ALLOW_HEADERS = 'Content-Type, Authorization'
 
-if __name__ == '__main__':
-    # Enable permissive CORS for development
     @app.before_request
     def _cors_handle_preflight():
         if request.method == 'OPTIONS':
+            # Origin/Methods are added by _cors_add_headers, which also runs for this response
             response = app.make_default_options_response()
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-            requested_headers = request.headers.get('Access-Control-Request-Headers', '')
-            if requested_headers:
-                response.headers['Access-Control-Allow-Headers'] = requested_headers
-            else:
-                response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = (
+                request.headers.get('Access-Control-Request-Headers') or _DEV_CORS_DEFAULT_ALLOW_HEADERS
+            )
             response.headers['Access-Control-Max-Age'] = '86400'
             return response
 
     @app.after_request
     def _cors_add_headers(response):
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
+        response.headers.update(_DEV_CORS_HEADERS)
         # Keep this broad for dev; browsers will ignore extras if not needed
-        if 'Access-Control-Allow-Headers' not in response.headers:
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers.setdefault('Access-Control-Allow-Headers', _DEV_CORS_DEFAULT_ALLOW_HEADERS)
         return response
 
+if __name__ == '__main__':
     init_db()
     port = int(os.getenv("TNYR_PORT", "5502"))
     app.run(host='0.0.0.0', port=port)
@@ -1,12 +1,12 @@
 CREATE TABLE IF NOT EXISTS urls (
-    lookup_hash TEXT PRIMARY KEY,
+    lookup_hash BLOB PRIMARY KEY,
     iv BLOB NOT NULL,
     encrypted_url BLOB NOT NULL
-);
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS client_side_urls (
-    lookup_hash TEXT PRIMARY KEY,
+    lookup_hash BLOB PRIMARY KEY,
     encryption_salt BLOB NOT NULL,
     iv BLOB NOT NULL,
     encrypted_url BLOB NOT NULL
-);
\ No newline at end of file
+) WITHOUT ROWID;
\ No newline at end of file
@@ -9,7 +9,6 @@ if [ -z "${TNYR_SALT1_HEX:-}" ] || [ -z "${TNYR_SALT2_HEX:-}" ]; then
 fi
 
 PUBLIC_URL="${TNYR_PUBLIC_URL:-}"
-PORT="${TNYR_PORT:-5502}"
 DB_PATH="${TNYR_DB_PATH:-}"
 
 if [ -z "$PUBLIC_URL" ]; then
@@ -54,10 +53,12 @@ if [ -d "$DIST_DIR" ]; then
   else
     echo "Could not derive domain from TNYR_PUBLIC_URL; leaving placeholders as-is in static files."
   fi
+  # Pre-compress after placeholders are replaced; WhiteNoise serves the .gz variants directly
+  python -m whitenoise.compress "$DIST_DIR"
 fi
 
 cd /app/backend
 python -c "import main; main.init_db()"
-exec gunicorn --workers 2 --bind "0.0.0.0:${PORT}" wsgi:app
+exec gunicorn -c gunicorn.conf.py wsgi:app
 
 
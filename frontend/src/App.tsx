@@ -167,8 +167,12 @@ const arrayToHex = (array: Uint8Array) => {
   return Array.from(array, byte => byte.toString(16).padStart(2, '0')).join('');
 };
 
-const hexToArray = (hex: string) => {
-  return new Uint8Array(hex.match(/.{1,2}/g)!.map(byte => parseInt(byte, 16)));
+const arrayToBase64 = (array: Uint8Array) => {
+  return btoa(String.fromCharCode(...array));
+};
+
+const base64ToArray = (b64: string) => {
+  return Uint8Array.from(atob(b64), char => char.charCodeAt(0));
 };
 
 export default function App() {
@@ -192,11 +196,11 @@ export default function App() {
           const lookupHash = arrayToHex(lookupKey);
           
           // Get encrypted data from server
-          const response = await axios.get(`${API_BASE_URL}/get-encrypted-url?lookup_hash=${lookupHash}`);
+          const response = await axios.get(`${API_BASE_URL}/get-encrypted-url?format=b64&lookup_hash=${lookupHash}`);
           const { ENCRYTION_SALT, IV, ENCRYPTED_URL } = response.data;
           
           // Derive decryption key using the encryption salt
-          const encryptionSalt = hexToArray(ENCRYTION_SALT);
+          const encryptionSalt = base64ToArray(ENCRYTION_SALT);
           
           // Allow UI to stay responsive during heavy computation
           await new Promise(resolve => setTimeout(resolve, 15));
@@ -204,8 +208,8 @@ export default function App() {
           const decryptionKey = deriveEncryptionKey(hash, encryptionSalt);
           
           // Decrypt URL
-          const iv = hexToArray(IV);
-          const encryptedUrl = hexToArray(ENCRYPTED_URL);
+          const iv = base64ToArray(IV);
+          const encryptedUrl = base64ToArray(ENCRYPTED_URL);
           const decryptedUrl = await decryptUrl(decryptionKey, iv, encryptedUrl);
           
           // Check if this is an abuse warning
@@ -270,9 +274,10 @@ export default function App() {
       // Send to server
       await axios.post(`${API_BASE_URL}/shorten`, {
         LOOKUP_HASH: arrayToHex(lookupKey),
-        ENCRYTION_SALT: arrayToHex(encryptionSalt),
-        IV: arrayToHex(iv),
-        ENCRYPTED_URL: arrayToHex(encrypted)
+        ENCRYTION_SALT: arrayToBase64(encryptionSalt),
+        IV: arrayToBase64(iv),
+        ENCRYPTED_URL: arrayToBase64(encrypted),
+        FORMAT: 'b64'
       });
       
       const shortUrl = PUBLIC_URL ? `${PUBLIC_URL}/#${linkId}` : `https://${SITE_HOST}/#${linkId}`;